@@ -11,8 +11,8 @@ from .comfy_workflow import ComfyObjectInfo
 from .image import ImageCollection, Point
 from .properties import Property, ObservableProperties
 from .files import FileLibrary, FileFormat
-from .style import Style
-from .settings import PerformanceSettings
+from .style import Style, Styles
+from .settings import PerformanceSettings, settings
 from .resources import ControlMode, ResourceKind, Arch, UpscalerName
 from .resources import CustomNode, ResourceId
 from .localization import translate as _
@@ -212,6 +212,8 @@ class ClientModels:
         self.upscalers: list[str] = []
         self.node_inputs = ComfyObjectInfo({})
         self.resources: dict[str, str | None] = {}
+        self._preferred_checkpoints: dict[tuple[str, ...], str] = {}
+        self._preferred_checkpoints_source: tuple[dict[str, CheckpointInfo], int] | None = None
 
     @staticmethod
     def from_dict(data: dict):
@@ -244,6 +246,20 @@ class ClientModels:
         # Search for architecture-agnostic model
         return self.resources.get(id._replace(arch=Arch.all).string)
 
+    def preferred_checkpoint(self, style: Style):
+        """Like `Style.preferred_checkpoint`, but cached until the checkpoint list changes."""
+        source = (self.checkpoints, len(self.checkpoints))
+        cached = self._preferred_checkpoints_source
+        if cached is None or cached[0] is not source[0] or cached[1] != source[1]:
+            self._preferred_checkpoints = {}
+            self._preferred_checkpoints_source = source
+        key = tuple(style.checkpoints)
+        result = self._preferred_checkpoints.get(key)
+        if result is None:
+            result = style.preferred_checkpoint(self.checkpoints.keys())
+            self._preferred_checkpoints[key] = result
+        return result
+
     def arch_of(self, checkpoint: str):
         if info := self.checkpoints.get(checkpoint):
             return info.arch
@@ -389,6 +405,8 @@ class Client(ABC):
     models: ClientModels
     device_info: DeviceInfo
 
+    _compatible_styles: tuple[tuple, dict[str, CheckpointInfo], list[Style]] | None = None
+
     @staticmethod
     @abstractmethod
     async def connect(url: str, access_token: str = "") -> Client: ...
@@ -404,6 +422,24 @@ class Client(ABC):
     @abstractmethod
     async def enqueue(self, work: WorkflowInput, front: bool = False) -> str: ...
 
+    def compatible_styles(self, show_builtin: bool | None = None):
+        """Styles which can be used with the models available on this client.
+        The result is cached until styles or models change."""
+        if show_builtin is None:
+            show_builtin = settings.show_builtin_styles
+        checkpoints = self.models.checkpoints
+        key = (Styles.revision, show_builtin, len(checkpoints))
+        cached = self._compatible_styles
+        if cached is None or cached[0] != key or cached[1] is not checkpoints:
+            styles = filter_supported_styles(Styles.list().filtered(show_builtin), self)
+            self._compatible_styles = cached = (key, checkpoints, styles)
+        return list(cached[2])
+
+    async def enqueue_many(self, works: Iterable[WorkflowInput], front: bool = False):
+        """Enqueue several jobs with one call. Returns job IDs in the same order as `works`.
+        Jobs are dispatched concurrently, they must not depend on each other."""
+        return list(await asyncio.gather(*(self.enqueue(work, front) for work in works)))
+
     @abstractmethod
     def listen(self) -> AsyncGenerator[ClientMessage, Any]: ...
 
@@ -453,7 +489,7 @@ def resolve_arch(style: Style, client: Client | ClientModels | None = None):
 
     if client:
         models = client.models if isinstance(client, Client) else client
-        checkpoint = style.preferred_checkpoint(models.checkpoints.keys())
+        checkpoint = models.preferred_checkpoint(style)
         if checkpoint != "not-found":
             arch = models.arch_of(checkpoint)
     elif style.checkpoints:
@@ -469,7 +505,7 @@ def is_style_supported(style: Style, client: Client | None = None):
     if client:
         return (
             client.supports_arch(resolve_arch(style, client))
-            and style.preferred_checkpoint(client.models.checkpoints.keys()) != "not-found"
+            and client.models.preferred_checkpoint(style) != "not-found"
         )
     return True
 
@@ -3,7 +3,8 @@ import asyncio
 import json
 import struct
 import uuid
-from dataclasses import dataclass
+import weakref
+from dataclasses import dataclass, fields, is_dataclass, replace
 from enum import Enum
 from itertools import chain, product
 from time import time
@@ -13,8 +14,8 @@ from .api import WorkflowInput
 from .client import Client, CheckpointInfo, ClientMessage, ClientEvent, DeviceInfo, ClientModels
 from .client import SharedWorkflow, TranslationPackage, ClientFeatures, ClientJobQueue, TextOutput
 from .client import JobInfoOutput, OutputBatchMode, Quantization, MissingResources
-from .client import filter_supported_styles, loras_to_upload
-from .comfy_workflow import ComfyObjectInfo
+from .client import loras_to_upload
+from .comfy_workflow import ComfyObjectInfo, ComfyWorkflow
 from .files import FileFormat
 from .image import Image, ImageCollection, Point
 from .network import RequestManager, NetworkError
@@ -126,6 +127,7 @@ class ComfyClient(Client):
         self._supported_archs: dict[Arch, list[ResourceId]] = {}
         self._messages: asyncio.Queue[ClientMessage] = asyncio.Queue()
         self._queue: ClientJobQueue[JobInfo] = ClientJobQueue()
+        self._last_workflow: tuple[tuple, ComfyWorkflow] | None = None
         self._is_connected = False
 
         self._requests.add_header("ngrok-skip-browser-warning", "69420")
@@ -276,7 +278,7 @@ class ComfyClient(Client):
             pass
 
     async def _run_job(self, job: JobInfo):
-        workflow = create_workflow(job.work, self.models)
+        workflow = self._create_workflow(job.work)
         if settings.debug_dump_workflow:
             workflow.embed_images().dump(util.log_dir)
 
@@ -300,6 +302,21 @@ class ComfyClient(Client):
             self._waiting_job.clear()
             raise e
 
+    def _create_workflow(self, work: WorkflowInput):
+        # Jobs of the same batch only differ in seed. Reuse the graph (and encoded images)
+        # of the previous job instead of building it again.
+        if work.sampling is None or work.custom_workflow is not None:
+            self._last_workflow = None
+            return create_workflow(work, self.models)
+
+        key = _workflow_input_key(replace(work, sampling=replace(work.sampling, seed=0)))
+        if self._last_workflow and self._last_workflow[0] == key:
+            return self._last_workflow[1].reseed(work.sampling.seed)
+
+        workflow = create_workflow(work, self.models)
+        self._last_workflow = (key, workflow)
+        return workflow
+
     async def _listen(self):
         url = websocket_url(self.url)
         args = websocket_args(settings.server_authorization)
@@ -476,6 +493,7 @@ class ComfyClient(Client):
         self, nodes: ComfyObjectInfo, checkpoints: dict | None, diffusion_models: dict | None
     ):
         models = self.models
+        self._last_workflow = None
 
         def parse_model_info(models: dict, model_format: FileFormat):
             parsed = (
@@ -824,7 +842,7 @@ def _find_inpaint_models(model_list: Sequence[str]):
 
 
 def _ensure_supported_style(client: Client):
-    styles = filter_supported_styles(Styles.list(), client)
+    styles = client.compatible_styles(show_builtin=True)
     if len(styles) == 0:
         supported_checkpoints = (
             cp.filename
@@ -917,3 +935,31 @@ def _extract_job_info_output(job_id: str, msg: dict):
     except Exception as e:
         log.warning(f"Error processing Krita resize output: {e}, msg={msg}")
     return None
+
+
+class _ImageRef:
+    """Compares equal to another reference to the same image, without keeping it alive."""
+
+    __slots__ = ("_ref",)
+
+    def __init__(self, image: Image | ImageCollection):
+        self._ref = weakref.ref(image)
+
+    def __eq__(self, other):
+        image = self._ref()
+        return isinstance(other, _ImageRef) and image is not None and image is other._ref()
+
+
+def _workflow_input_key(value) -> Any:
+    """Converts workflow input into a structure which can be compared cheaply: images are
+    compared by identity (batch jobs share them) instead of by their pixels."""
+    if isinstance(value, (Image, ImageCollection)):
+        return _ImageRef(value)
+    if is_dataclass(value):
+        fields_key = tuple(_workflow_input_key(getattr(value, f.name)) for f in fields(value))
+        return (type(value), fields_key)
+    if isinstance(value, (list, tuple)):
+        return tuple(_workflow_input_key(v) for v in value)
+    if isinstance(value, dict):
+        return tuple((k, _workflow_input_key(v)) for k, v in value.items())
+    return value
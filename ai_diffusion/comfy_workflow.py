@@ -5,6 +5,7 @@ from pathlib import Path
 from typing import NamedTuple, Tuple, Literal, TypeVar, overload, Any
 from uuid import uuid4
 import json
+import random
 import zlib
 
 from .image import Bounds, Extent, Image, ImageCollection
@@ -63,6 +64,9 @@ class ComfyWorkflow:
         self.image_data: dict[str, bytes] = {}
         self.node_count = 0
         self.sample_count = 0
+        # Node inputs (node id, input name) which receive the job seed, or a random seed
+        self.seed_inputs: set[tuple[str, str]] = set()
+        self.random_seed_inputs: set[tuple[str, str]] = set()
         self.node_defs = node_defs or ComfyObjectInfo({})
         self._cache: dict[str, Output | Output2 | Output3 | Output4] = {}
         self._run_mode: ComfyRunMode = run_mode
@@ -170,6 +174,29 @@ class ComfyWorkflow:
         result.sample_count = self.sample_count
         return result
 
+    def track_seed(self, output: Output, input_name: str, random_seed=False):
+        """Register a node input which receives the job seed (or a seed chosen at random
+        while building the graph), so `reseed` can update it."""
+        key = (str(output.node), input_name)
+        (self.random_seed_inputs if random_seed else self.seed_inputs).add(key)
+
+    def reseed(self, new_seed: int):
+        """Returns a copy of the graph where tracked seed inputs use `new_seed`, and random
+        seeds are chosen again. Image data is shared with the original workflow."""
+        result = ComfyWorkflow(self.node_defs, self._run_mode)
+        result.root = deepcopy(self.root)
+        result.images = self.images
+        result.image_data = self.image_data
+        result.node_count = self.node_count
+        result.sample_count = self.sample_count
+        result.seed_inputs = self.seed_inputs
+        result.random_seed_inputs = self.random_seed_inputs
+        for id, name in self.seed_inputs:
+            result.root[id]["inputs"][name] = new_seed
+        for id, name in self.random_seed_inputs:
+            result.root[id]["inputs"][name] = random.randint(0, 2**31 - 1)
+        return result
+
     def dump(self, filepath: str | Path):
         filepath = Path(filepath)
         if filepath.suffix != ".json":
@@ -285,7 +312,7 @@ class ComfyWorkflow:
         seed=1234,
     ):
         self.sample_count += steps
-        return self.add(
+        result = self.add(
             "KSampler",
             1,
             seed=seed,
@@ -299,6 +326,8 @@ class ComfyWorkflow:
             cfg=cfg,
             denoise=denoise,
         )
+        self.track_seed(result, "seed")
+        return result
 
     def ksampler_advanced(
         self,
@@ -314,7 +343,7 @@ class ComfyWorkflow:
     ):
         self.sample_count += steps - start_at_step
 
-        return self.add(
+        result = self.add(
             "KSamplerAdvanced",
             1,
             noise_seed=seed,
@@ -331,6 +360,8 @@ class ComfyWorkflow:
             add_noise="enable",
             return_with_leftover_noise="disable",
         )
+        self.track_seed(result, "noise_seed")
+        return result
 
     def sampler_custom_advanced(
         self,
@@ -458,11 +489,13 @@ class ComfyWorkflow:
         return self.add("FluxGuidance", 1, conditioning=conditioning, guidance=guidance)
 
     def random_noise(self, noise_seed=-1):
-        return self.add_cached(
+        result = self.add_cached(
             "RandomNoise",
             output_count=1,
             noise_seed=noise_seed,
         )
+        self.track_seed(result, "noise_seed")
+        return result
 
     def sampler_select(self, sampler_name="dpmpp_2m_sde_gpu"):
         if sampler_name == "euler_cfgpp":
@@ -1,5 +1,7 @@
 from __future__ import annotations
 from PyQt5.QtCore import QObject, pyqtSignal, QUuid, Qt
+from collections import OrderedDict
+from contextlib import contextmanager
 from typing import Any, NamedTuple
 from pathlib import Path
 import json
@@ -18,6 +20,7 @@ class ControlLayer(QObject, ObservableProperties):
     max_preset_value = 4
     strength_multiplier = 50
     clip_vision_extent = Extent(224, 224)
+    max_cached_images = 8
 
     mode = Property(ControlMode.reference, persist=True, setter="set_mode")
     layer_id = Property(QUuid(), persist=True)
@@ -55,6 +58,7 @@ class ControlLayer(QObject, ObservableProperties):
         self._model = model
         self._index = index
         self._generate_job: jobs.Job | None = None
+        self._image_cache: OrderedDict[tuple, Image] | None = None
         self.layer_id = layer_id
         self.mode = mode
         self._update_is_supported()
@@ -64,6 +68,8 @@ class ControlLayer(QObject, ObservableProperties):
         model.edit_mode_changed.connect(self._update_is_supported)
         root.connection.state_changed.connect(self._update_is_supported)
         self.layer_id_changed.connect(self._update_is_pose_vector)
+        for signal in (self.mode_changed, self.layer_id_changed, model.style_changed):
+            signal.connect(self._clear_image_cache)
         model.jobs.job_finished.connect(self._update_active_job)
 
     @property
@@ -111,6 +117,28 @@ class ControlLayer(QObject, ObservableProperties):
 
     def to_api(self, bounds: Bounds | None = None, time: int | None = None):
         assert self.is_supported, "Control layer is not supported"
+        strength = self.strength / self.strength_multiplier
+        image = self._get_cached_image(bounds, time)
+        return ControlInput(self.mode, image, strength, (self.start, self.end))
+
+    def _get_cached_image(self, bounds: Bounds | None, time: int | None):
+        if self._image_cache is None:
+            return self._get_image(bounds, time)
+
+        frame = time
+        if time is not None and not self.layer.is_animated:
+            frame = 0  # pixel content is the same for all frames
+        key = (bounds, frame)
+        if (image := self._image_cache.get(key)) is not None:
+            self._image_cache.move_to_end(key)
+            return image
+        image = self._get_image(bounds, time)
+        self._image_cache[key] = image
+        if len(self._image_cache) > self.max_cached_images:
+            self._image_cache.popitem(last=False)
+        return image
+
+    def _get_image(self, bounds: Bounds | None, time: int | None):
         extent = bounds.extent if bounds else self._model.document.extent
         layer = self.layer
         if self.mode.is_ip_adapter and not layer.bounds.is_zero:
@@ -128,9 +156,11 @@ class ControlLayer(QObject, ObservableProperties):
                     image = Image.scale(image, Extent(w, extent.height))
             else:
                 image = Image.scale(image, self.clip_vision_extent)
+        return image
 
-        strength = self.strength / self.strength_multiplier
-        return ControlInput(self.mode, image, strength, (self.start, self.end))
+    def _clear_image_cache(self):
+        if self._image_cache is not None:
+            self._image_cache.clear()
 
     def generate(self):
         self._generate_job = self._model.generate_control_layer(self)
@@ -216,6 +246,7 @@ class ControlLayerList(QObject):
     _model: "model.Model"
     _layers: list[ControlLayer]
     _last_mode = ControlMode.scribble
+    _excluded_layers: list[Layer] | None = None
 
     def __init__(self, model: "model.Model"):
         super().__init__()
@@ -235,7 +266,10 @@ class ControlLayerList(QObject):
         mode = ControlMode.reference if self._model.arch.is_edit else self._last_mode
         control = ControlLayer(self._model, mode, layer.id, len(self._layers))
         control.mode_changed.connect(self._update_last_mode)
+        control.mode_changed.connect(self._reset_excluded_layers)
+        control.layer_id_changed.connect(self._reset_excluded_layers)
         self._layers.append(control)
+        self._excluded_layers = None
         self.added.emit(control)
 
     def emplace(self):
@@ -244,6 +278,7 @@ class ControlLayerList(QObject):
 
     def remove(self, control: ControlLayer):
         self._layers.remove(control)
+        self._excluded_layers = None
         self.removed.emit(control)
 
         for i, c in enumerate(self._layers):
@@ -254,9 +289,32 @@ class ControlLayerList(QObject):
             log.warning(f"Trying to use control layer {layer.mode.name}: {layer.error_text}")
         return [c.to_api(bounds, time) for c in self._layers if c.is_supported]
 
+    @property
+    def excluded_layers(self):
+        """Layers used by controls which are not part of the image (eg. pose, depth)."""
+        if self._excluded_layers is None:
+            self._excluded_layers = [c.layer for c in self._layers if not c.mode.is_part_of_image]
+        return self._excluded_layers
+
+    @contextmanager
+    def cache_images(self):
+        """Reuse control layer images for identical bounds and time while the context is active.
+        Layer content is treated as a snapshot, changes made within the context are ignored."""
+        layers = list(self._layers)
+        for c in layers:
+            c._image_cache = OrderedDict()
+        try:
+            yield
+        finally:
+            for c in layers:
+                c._image_cache = None
+
     def _update_last_mode(self, mode: ControlMode):
         self._last_mode = mode
 
+    def _reset_excluded_layers(self):
+        self._excluded_layers = None
+
     def _remove_layer(self, layer: Layer):
         if control := next((c for c in self._layers if c.layer_id == layer.id), None):
             self.remove(control)
@@ -190,14 +190,13 @@ class KritaDocument(Document):
         if not user_selection:
             return None, None
 
-        if _selection_is_entire_document(user_selection, self.extent):
+        extent = self.extent
+        selection_bounds = _selection_bounds(user_selection)
+        if _selection_is_entire_document(user_selection, selection_bounds, extent):
             return None, None
 
         selection = user_selection.duplicate()
-        original_bounds = Bounds(
-            selection.x(), selection.y(), selection.width(), selection.height()
-        )
-        original_bounds = Bounds.clamp(original_bounds, self.extent)
+        original_bounds = Bounds.clamp(selection_bounds, extent)
         size_factor = original_bounds.extent.diagonal
         padding_pixels = int(padding * size_factor)
 
@@ -208,7 +207,7 @@ class KritaDocument(Document):
         bounds = Bounds.pad(
             bounds, padding_pixels, multiple=multiple, min_size=min_size, square=square
         )
-        bounds = Bounds.clamp(bounds, self.extent)
+        bounds = Bounds.clamp(bounds, extent)
         data = selection.pixelData(*bounds)
         return Mask(bounds, data), original_bounds
 
@@ -308,14 +307,13 @@ def _selection_bounds(selection: krita.Selection):
     return Bounds(selection.x(), selection.y(), selection.width(), selection.height())
 
 
-def _selection_is_entire_document(selection: krita.Selection, extent: Extent):
-    bounds = _selection_bounds(selection)
+def _selection_is_entire_document(selection: krita.Selection, bounds: Bounds, extent: Extent):
     if bounds.x > 0 or bounds.y > 0:
         return False
     if bounds.width + bounds.x < extent.width or bounds.height + bounds.y < extent.height:
         return False
     mask = selection.pixelData(*bounds)
-    is_opaque = all(x == b"\xff" for x in mask)
+    is_opaque = mask.count(b"\xff") == mask.size()
     return is_opaque
 
 
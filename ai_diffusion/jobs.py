@@ -151,6 +151,8 @@ class JobQueue(QObject):
     def __init__(self):
         super().__init__()
         self._entries: deque[Job] = deque()
+        self._by_id: dict[str, Job] = {}
+        self._executing_count = 0
         self._selection: list[JobQueue.Item] = []
         self._previous_selection: JobQueue.Item | None = None
         self._memory_usage = 0  # in MB
@@ -165,17 +167,29 @@ class JobQueue(QObject):
 
     def add_job(self, job: Job):
         self._entries.append(job)
+        if job.id is not None:
+            self._by_id[job.id] = job
+        if job.state is JobState.executing:
+            self._executing_count += 1
         self.count_changed.emit()
         return job
 
+    def set_id(self, job: Job, id: str):
+        """Assigns the ID returned by the client after the job has been enqueued."""
+        if job.id is not None and self._by_id.get(job.id) is job:
+            del self._by_id[job.id]
+        job.id = id
+        self._by_id[id] = job
+
     def remove(self, job: Job):
         # Diffusion/Animation jobs: kept for history, pruned according to meomry usage
         # Other jobs: removed immediately once finished
         self._entries.remove(job)
+        self._unregister(job)
         self.count_changed.emit()
 
     def find(self, id: str):
-        return next((j for j in self._entries if j.id == id), None)
+        return self._by_id.get(id)
 
     def count(self, state: JobState):
         return sum(1 for j in self._entries if j.state is state)
@@ -192,11 +206,11 @@ class JobQueue(QObject):
 
     def notify_started(self, job: Job):
         if job.state is not JobState.executing:
-            job.state = JobState.executing
+            self._set_state(job, JobState.executing)
             self.count_changed.emit()
 
     def notify_finished(self, job: Job):
-        job.state = JobState.finished
+        self._set_state(job, JobState.finished)
         self.job_finished.emit(job)
         self._cancel_earlier_jobs(job)
         self.count_changed.emit()
@@ -205,7 +219,7 @@ class JobQueue(QObject):
             self.remove(job)
 
     def notify_cancelled(self, job: Job):
-        job.state = JobState.cancelled
+        self._set_state(job, JobState.cancelled)
         self._cancel_earlier_jobs(job)
         self.count_changed.emit()
 
@@ -226,6 +240,7 @@ class JobQueue(QObject):
 
     def _discard_job(self, job: Job):
         self._entries.remove(job)
+        self._unregister(job)
         self._memory_usage -= job.results.size / (1024**2)
         self.job_discarded.emit(job)
 
@@ -254,7 +269,11 @@ class JobQueue(QObject):
             self._discard_job(job)
 
     def any_executing(self):
-        return any(j.state is JobState.executing for j in self._entries)
+        return self._executing_count > 0
+
+    @property
+    def executing_count(self):
+        return self._executing_count
 
     def __len__(self):
         return len(self._entries)
@@ -279,6 +298,19 @@ class JobQueue(QObject):
     def memory_usage(self):
         return self._memory_usage
 
+    def _set_state(self, job: Job, state: JobState):
+        if job.state is JobState.executing:
+            self._executing_count -= 1
+        if state is JobState.executing:
+            self._executing_count += 1
+        job.state = state
+
+    def _unregister(self, job: Job):
+        if job.id is not None and self._by_id.get(job.id) is job:
+            del self._by_id[job.id]
+        if job.state is JobState.executing:
+            self._executing_count -= 1
+
     def _cancel_earlier_jobs(self, job: Job):
         # Clear jobs that should have been completed before, but may not have completed
         # (still queued or executing state) due to sporadic server disconnect
@@ -286,7 +318,7 @@ class JobQueue(QObject):
             if j is job:
                 break
             if j.state in [JobState.queued, JobState.executing]:
-                j.state = JobState.cancelled
+                self._set_state(j, JobState.cancelled)
 
 
 def _move_field(src: dict[str, Any], field: str, dest: dict[str, Any]):
@@ -5,13 +5,15 @@ import weakref
 import uuid
 from copy import copy
 from collections import deque
+from collections.abc import Callable
 from dataclasses import dataclass, replace
 from datetime import datetime
 from pathlib import Path
 from enum import Enum
+from functools import lru_cache, partial
 from tempfile import TemporaryDirectory
-from typing import Any, NamedTuple
-from PyQt5.QtCore import QObject, QMetaObject, QUuid, pyqtSignal, Qt
+from typing import Any, ClassVar, NamedTuple, TypeVar
+from PyQt5.QtCore import QObject, QMetaObject, QTimer, QUuid, pyqtSignal, Qt
 from PyQt5.QtGui import QPainter, QColor, QBrush
 
 from . import eventloop, workflow, util
@@ -25,7 +27,7 @@ from .settings import settings
 from .network import NetworkError
 from .image import Extent, Image, Mask, Bounds, DummyImage
 from .client import Client, ClientMessage, ClientEvent, ClientOutput
-from .client import is_style_supported, filter_supported_styles, resolve_arch
+from .client import is_style_supported, resolve_arch
 from .custom_workflow import CustomWorkspace, WorkflowCollection, CustomGenerationMode
 from .document import Document, KritaDocument
 from .layer import Layer, LayerType, RestoreActiveLayer
@@ -41,6 +43,8 @@ from .resources import ControlMode
 from .resolution import compute_bounds, compute_relative_bounds
 from .text import create_img_metadata
 
+T = TypeVar("T")
+
 
 class QueueMode(Enum):
     back = 0
@@ -145,6 +149,7 @@ class Model(QObject, ObservableProperties):
         self.animation = AnimationWorkspace(self)
         self.custom = CustomWorkspace(workflows, self._generate_custom, self.jobs)
         self._style_connection: QMetaObject.Connection | None = None
+        self._save_lock = asyncio.Lock()
 
         self.jobs.selection_changed.connect(self.update_preview)
         connection.state_changed.connect(self._init_on_connect)
@@ -156,7 +161,7 @@ class Model(QObject, ObservableProperties):
         if self._connection.state is not ConnectionState.connected:
             return
         if client := self._connection.client_if_connected:
-            styles = filter_supported_styles(Styles.list().filtered(), client)
+            styles = client.compatible_styles()
             if self.style not in styles and len(styles) > 0:
                 self.style = styles[0]
             if self.upscale.upscaler == "":
@@ -175,23 +180,38 @@ class Model(QObject, ObservableProperties):
 
     def _generate(self, queue_mode: QueueMode):
         """Enqueue image generation for the current setup."""
-        ok, msg = self._doc.check_color_mode()
-        if not ok and msg:
-            self.report_error(msg)
-            return
+        with self.batch():
+            ok, msg = self._doc.check_color_mode()
+            if not ok and msg:
+                self.report_error(msg)
+                return
 
-        try:
-            input, job_params, cond_orig = self._prepare_workflow()
-        except Exception as e:
-            self.report_error(util.log_error(e))
-            return
-        self.clear_error()
-        jobs = self.enqueue_jobs(
-            input, JobKind.diffusion, job_params, cond_orig, self.batch_count, queue_mode
-        )
-        eventloop.run(_report_errors(self, jobs))
+            try:
+                prepare, finish = self._collect_workflow_inputs()
+            except Exception as e:
+                self.report_error(util.log_error(e))
+                return
+            self.clear_error()
+            jobs = self._enqueue_workflow(prepare, finish, self.batch_count, queue_mode)
+            eventloop.run(_report_errors(self, jobs))
+
+    async def _enqueue_workflow(
+        self,
+        prepare: Callable[[], WorkflowInput],
+        finish: Callable[[WorkflowInput], tuple[WorkflowInput, JobParams, ConditioningInput]],
+        count: int,
+        queue_mode: QueueMode,
+    ):
+        input, job_params, cond_orig = finish(await _run_in_thread(prepare))
+        await self.enqueue_jobs(input, JobKind.diffusion, job_params, cond_orig, count, queue_mode)
 
     def _prepare_workflow(self, dryrun=False):
+        prepare, finish = self._collect_workflow_inputs(dryrun)
+        return finish(prepare())
+
+    def _collect_workflow_inputs(self, dryrun=False):
+        """Reads everything required from the document and UI state. Returns a function which
+        prepares the workflow input (can run in a thread) and one to complete the job parameters."""
         arch = self.arch
         workflow_kind = WorkflowKind.generate
         strength = self.strength
@@ -257,11 +277,13 @@ class Model(QObject, ObservableProperties):
             inpaint.grow, inpaint.feather = selection_mod.apply(selection_bounds)
             inpaint.blend = settings.selection_blend
 
-        input = workflow.prepare(
+        style = self.active_style
+        prepare = partial(
+            workflow.prepare,
             workflow_kind,
             image or extent,
             conditioning,
-            self.active_style,
+            style,
             seed,
             client.models,
             FileLibrary.instance(),
@@ -272,16 +294,20 @@ class Model(QObject, ObservableProperties):
             inpaint=inpaint,
             layer_count=self.layer_count,
         )
-        loras = input.models.loras if input.models else []
         job_name = prompt_meta.get("prompt_eval", prompt_meta["prompt"])
         job_params = JobParams(bounds, job_name, regions=job_regions)
-        job_params.set_style(self.active_style, ensure(input.models).checkpoint)
         job_params.set_control(regions.control)
         job_params.is_layered = arch is Arch.qwen_l
         job_params.metadata.update(prompt_meta)
-        job_params.metadata["loras"] = [dict(name=l.name, weight=l.strength) for l in loras]
         job_params.metadata["strength"] = strength
-        return input, job_params, original_conditioning
+
+        def finish(input: WorkflowInput):
+            loras = input.models.loras if input.models else []
+            job_params.set_style(style, ensure(input.models).checkpoint)
+            job_params.metadata["loras"] = [dict(name=l.name, weight=l.strength) for l in loras]
+            return input, job_params, original_conditioning
+
+        return prepare, finish
 
     async def enqueue_jobs(
         self,
@@ -301,6 +327,8 @@ class Model(QObject, ObservableProperties):
                 await self._connection.client.cancel(to_cancel)
             queue_mode = QueueMode.back
 
+        jobs: list[Job] = []
+        inputs: list[WorkflowInput] = []
         for i in range(count):
             seed = sampling.seed + i * settings.batch_size
             params.seed = seed
@@ -313,15 +341,20 @@ class Model(QObject, ObservableProperties):
                     input.conditioning = next_prompt.conditioning
                     params.metadata = params.metadata | next_prompt.metadata
                     params.name = params.metadata.get("prompt_eval", params.name)
-            job = self.jobs.add(kind, copy(params))
-            front = queue_mode is QueueMode.front
-            await self._enqueue_job(job, input, front=front)
+            jobs.append(self.jobs.add(kind, copy(params)))
+            inputs.append(input)
+        await self._enqueue_jobs(jobs, inputs, front=queue_mode is QueueMode.front)
 
     async def _enqueue_job(self, job: Job, input: WorkflowInput, front: bool = False):
+        await self._enqueue_jobs([job], [input], front)
+
+    async def _enqueue_jobs(self, jobs: list[Job], inputs: list[WorkflowInput], front=False):
         if not self.jobs.any_executing():
             self.progress = 0.0
         client = self._connection.client
-        job.id = await client.enqueue(input, front)
+        ids = await client.enqueue_many(inputs, front)
+        for job, id in zip(jobs, ids):
+            self.jobs.set_id(job, id)
 
     def _prepare_upscale_image(self, dryrun=False):
         client = self._connection.client
@@ -402,10 +435,19 @@ class Model(QObject, ObservableProperties):
             return 0
 
     def generate_live(self):
-        input, job_params = self._prepare_live_workflow()
-        eventloop.run(_report_errors(self, self._generate_live(input, job_params)))
+        async def prepare_and_generate():
+            input, job_params = await self._prepare_live_workflow()
+            await self._generate_live(input, job_params)
+
+        eventloop.run(_report_errors(self, prepare_and_generate()))
+
+    async def _prepare_live_workflow(self):
+        with self.batch():
+            prepare, params = self._collect_live_workflow_inputs()
+        input = await _run_in_thread(prepare)
+        return input, params
 
-    def _prepare_live_workflow(self):
+    def _collect_live_workflow_inputs(self):
         strength = self.live.strength
         workflow_kind = WorkflowKind.generate
         if strength < 1.0 or self.is_editing:
@@ -447,7 +489,8 @@ class Model(QObject, ObservableProperties):
         )
         self._add_reference_layers(conditioning, layers, region_layers)
 
-        input = workflow.prepare(
+        prepare = partial(
+            workflow.prepare,
             workflow_kind,
             image or bounds.extent,
             conditioning,
@@ -463,7 +506,7 @@ class Model(QObject, ObservableProperties):
             is_live=True,
         )
         params = JobParams(bounds, conditioning.positive, regions=job_regions)
-        return input, params
+        return prepare, params
 
     async def _generate_live(self, input: WorkflowInput, job_params: JobParams):
         self.clear_error()
@@ -520,9 +563,7 @@ class Model(QObject, ObservableProperties):
     def _get_current_image(self, bounds: Bounds):
         exclude = []
         if self.workspace is not Workspace.live:
-            exclude = [  # exclude control layers from projection
-                c.layer for c in self.regions.control if not c.mode.is_part_of_image
-            ]
+            exclude = list(self.regions.control.excluded_layers)  # exclude control layers
             if self._layer:  # exclude preview layer
                 exclude.append(self._layer)
 
@@ -580,45 +621,65 @@ class Model(QObject, ObservableProperties):
             self.error = no_error
 
     def handle_message(self, message: ClientMessage):
-        job = self.jobs.find(message.job_id)
-        if job is None:
-            util.client_logger.error(f"Received message {message} for unknown job.")
-            return
+        with self.batch():
+            job = self.jobs.find(message.job_id)
+            if job is None:
+                util.client_logger.error(f"Received message {message} for unknown job.")
+                return
 
-        if message.event is ClientEvent.queued:
-            self.jobs.notify_started(job)
-            self.progress = -1
-            self.progress_changed.emit(-1)
-        elif message.event is ClientEvent.progress:
-            self.jobs.notify_started(job)
-            self.progress_kind = ProgressKind.generation
-            self.progress = message.progress
-        elif message.event is ClientEvent.upload:
-            self.jobs.notify_started(job)
-            self.progress_kind = ProgressKind.upload
-            self.progress = message.progress
-        elif message.event is ClientEvent.output:
-            self.custom.handle_output(job, message.result)
-        elif message.event is ClientEvent.finished:
-            if message.error:  # successful jobs may have encountered some warnings
-                self.report_error(Error.from_string(message.error, ErrorKind.warning))
-            if message.images:
-                self.jobs.set_results(job, message.images)
-            if job.kind is JobKind.control_layer:
-                assert job.control is not None
-                job.control.layer_id = self.add_control_layer(job, message.result).id
-            elif job.kind is JobKind.upscaling:
-                self.add_upscale_layer(job)
-            self._finish_job(job, message.event)
-        elif message.event is ClientEvent.interrupted:
-            self._finish_job(job, message.event)
-        elif message.event is ClientEvent.error:
-            self._finish_job(job, message.event)
-            self.report_error(_("Server error") + f": {message.error}")
-        elif message.event is ClientEvent.payment_required:
-            self._finish_job(job, ClientEvent.error)
-            assert isinstance(message.error, str) and isinstance(message.result, dict)
-            self.report_error(Error(ErrorKind.insufficient_funds, message.error, message.result))
+            if handler := Model._message_handlers.get(message.event):
+                handler(self, job, message)
+
+    def _handle_queued(self, job: Job, message: ClientMessage):
+        self.jobs.notify_started(job)
+        self.progress = -1
+        self._emit_changed("progress", -1)
+
+    def _handle_progress(self, job: Job, message: ClientMessage):
+        self.jobs.notify_started(job)
+        self._report_progress(ProgressKind.generation, message.progress)
+
+    def _handle_upload(self, job: Job, message: ClientMessage):
+        self.jobs.notify_started(job)
+        self._report_progress(ProgressKind.upload, message.progress)
+
+    def _handle_output(self, job: Job, message: ClientMessage):
+        self.custom.handle_output(job, message.result)
+
+    def _handle_finished(self, job: Job, message: ClientMessage):
+        if message.error:  # successful jobs may have encountered some warnings
+            self.report_error(Error.from_string(message.error, ErrorKind.warning))
+        if message.images:
+            self.jobs.set_results(job, message.images)
+        if job.kind is JobKind.control_layer:
+            assert job.control is not None
+            job.control.layer_id = self.add_control_layer(job, message.result).id
+        elif job.kind is JobKind.upscaling:
+            self.add_upscale_layer(job)
+        self._finish_job(job, message.event)
+
+    def _handle_interrupted(self, job: Job, message: ClientMessage):
+        self._finish_job(job, message.event)
+
+    def _handle_error(self, job: Job, message: ClientMessage):
+        self._finish_job(job, message.event)
+        self.report_error(_("Server error") + f": {message.error}")
+
+    def _handle_payment_required(self, job: Job, message: ClientMessage):
+        self._finish_job(job, ClientEvent.error)
+        assert isinstance(message.error, str) and isinstance(message.result, dict)
+        self.report_error(Error(ErrorKind.insufficient_funds, message.error, message.result))
+
+    _message_handlers: ClassVar[dict[ClientEvent, Callable[[Model, Job, ClientMessage], None]]] = {
+        ClientEvent.queued: _handle_queued,
+        ClientEvent.progress: _handle_progress,
+        ClientEvent.upload: _handle_upload,
+        ClientEvent.output: _handle_output,
+        ClientEvent.finished: _handle_finished,
+        ClientEvent.interrupted: _handle_interrupted,
+        ClientEvent.error: _handle_error,
+        ClientEvent.payment_required: _handle_payment_required,
+    }
 
     def _finish_job(self, job: Job, event: ClientEvent):
         if job.kind is JobKind.upscaling:
@@ -638,6 +699,13 @@ class Model(QObject, ObservableProperties):
             self.jobs.notify_cancelled(job)
             self.progress = 0
 
+    def _report_progress(self, kind: ProgressKind, value: float):
+        # Skip increments below 0.5%, they aren't visible but cause a UI update each
+        if kind is self.progress_kind and abs(value - self.progress) < 0.005:
+            return
+        self.progress_kind = kind
+        self.progress = value
+
     def update_preview(self):
         if selection := self.jobs.selection:
             self.show_preview(selection[0].job, selection[0].image)
@@ -830,11 +898,11 @@ class Model(QObject, ObservableProperties):
         )
 
     def set_workspace(self, workspace: Workspace):
-        if self.workspace is Workspace.live:
-            self.live.is_active = False
-        self._workspace = workspace
-        self.workspace_changed.emit(workspace)
-        self.modified.emit(self, "workspace")
+        with self.batch():
+            if self.workspace is Workspace.live:
+                self.live.is_active = False
+            self._workspace = workspace
+            self._emit_changed("workspace", workspace, persist=True)
 
     def set_style(self, style: Style):
         if style is not self._style:
@@ -854,7 +922,7 @@ class Model(QObject, ObservableProperties):
         self.seed = workflow.generate_seed()
 
     def save_result(self, job_id: str, index: int):
-        _save_job_result(self, self.jobs.find(job_id), index)
+        eventloop.run(_report_errors(self, _save_job_result(self, self.jobs.find(job_id), index)))
 
     def resolve_inpaint_mode(self):
         if self.inpaint.mode is InpaintMode.automatic:
@@ -1048,6 +1116,7 @@ class UpscaleWorkspace(QObject, ObservableProperties):
         super().__init__()
         self._model = weakref.ref(model)
         self._in_progress = False
+        self._target_extent_pending = False
         self.use_diffusion_changed.connect(self._update_can_generate)
         self._init_model()
         model._connection.models_changed.connect(self._init_model)
@@ -1066,9 +1135,15 @@ class UpscaleWorkspace(QObject, ObservableProperties):
         if self._factor != value:
             self._factor = value
             self.factor_changed.emit(value)
-            self.target_extent_changed.emit(self.target_extent)
+            if not self._target_extent_pending:  # emit once after a series of factor changes
+                self._target_extent_pending = True
+                QTimer.singleShot(0, self._emit_target_extent)
             self._update_can_generate()
 
+    def _emit_target_extent(self):
+        self._target_extent_pending = False
+        self.target_extent_changed.emit(self.target_extent)
+
     def _update_can_generate(self):
         self.can_generate = not self._in_progress
 
@@ -1164,7 +1239,11 @@ class LiveWorkspace(QObject, ObservableProperties):
         self._keyframes_folder: Path | None = None
         self._keyframe_start = 0
         self._keyframe_index = 0
+        self._keyframe_extent = Extent(0, 0)
         self._keyframes: list[Path] = []
+        self._keyframe_saves: list[asyncio.Task] = []
+        self._generate_requests: asyncio.Queue[None] = asyncio.Queue(maxsize=1)
+        self._generate_task: asyncio.Task | None = None
         model.jobs.job_finished.connect(self.handle_job_finished)
 
     @property
@@ -1174,10 +1253,9 @@ class LiveWorkspace(QObject, ObservableProperties):
     def toggle(self, active: bool):
         if self.is_active != active:
             self._is_active = active
-            self.is_active_changed.emit(active)
-            if active:
-                eventloop.run(_report_errors(self.model, self._continue_generating()))
-            else:
+            self._emit_changed("is_active", active)
+            self._request_generation()  # also wakes up the generation loop so it can exit
+            if not active:
                 self.is_recording = False
 
     def toggle_record(self, active: bool):
@@ -1187,9 +1265,10 @@ class LiveWorkspace(QObject, ObservableProperties):
                     _("Cannot save recorded frames, document must be saved first!")
                 )
                 return
-            self._is_recording = active
-            self.is_active = active
-            self.is_recording_changed.emit(active)
+            with self.batch():
+                self._is_recording = active
+                self.is_active = active
+                self._emit_changed("is_recording", active)
             if not active:
                 self._import_animation()
 
@@ -1199,12 +1278,29 @@ class LiveWorkspace(QObject, ObservableProperties):
                 self.set_result(job.results[0], job.params)
             self.is_active = self._is_active and self.model.document.is_active
             self._scheduler.notify_generation_finished()
-            eventloop.run(_report_errors(self.model, self._continue_generating()))
+            if self.is_active:
+                self._request_generation()
+
+    def _request_generation(self):
+        if not self._generate_requests.full():
+            self._generate_requests.put_nowait(None)
+        if self.is_active and (self._generate_task is None or self._generate_task.done()):
+            self._generate_task = eventloop.run(_report_errors(self.model, self._run()))
+
+    async def _run(self):
+        # Single consumer: there is at most one live job being prepared or generated
+        while True:
+            await self._generate_requests.get()
+            if not self.is_active:
+                break
+            await self._continue_generating()
 
     async def _continue_generating(self):
         while self.is_active:
             if self.model.document.is_active:
-                new_input, job_params = self.model._prepare_live_workflow()
+                new_input, job_params = await self.model._prepare_live_workflow()
+                if not (self.is_active and self.model.document.is_active):
+                    continue  # deactivated while the workflow was prepared
                 if self._scheduler.should_generate(new_input):
                     await self.model._generate_live(new_input, job_params)
                     self._scheduler.notify_generation_started()
@@ -1265,6 +1361,7 @@ class LiveWorkspace(QObject, ObservableProperties):
             while (self._keyframes_folder / f"frame-{self._keyframe_index}.webp").exists():
                 self._keyframe_index += 1
             self._keyframe_start = self._keyframe_index
+            self._keyframe_extent = self.model.document.extent
         else:
             self._keyframes_folder = None
         return self._keyframes_folder
@@ -1274,20 +1371,29 @@ class LiveWorkspace(QObject, ObservableProperties):
         filename = self._keyframes_folder / f"frame-{self._keyframe_index}.webp"
         self._keyframe_index += 1
 
-        extent = self.model.document.extent
-        if bounds is not None and bounds.extent != extent:
+        # Frames usually cover the whole canvas, only crop if they don't
+        width, height = self._keyframe_extent
+        if bounds is not None and (bounds.width != width or bounds.height != height):
             image = Image.crop(image, bounds)
-        image.save(filename)
+        self._keyframe_saves.append(eventloop.run(_run_in_thread(image.save, filename)))
         self._keyframes.append(filename)
 
     def _import_animation(self):
         if len(self._keyframes) == 0:
             return  # button toggled without recording a frame in between
-        self.model.document.import_animation(self._keyframes, self._keyframe_start)
-        start, end = self._keyframe_start, self._keyframe_start + len(self._keyframes)
-        prompt = self.model.regions.active_or_root.positive
-        self.model.layers.active.name = f"[Rec] {start}-{end}: {prompt}"
-        self._keyframes = []
+        keyframes, saves = self._keyframes, self._keyframe_saves
+        self._keyframes, self._keyframe_saves = [], []
+        start, end = self._keyframe_start, self._keyframe_start + len(keyframes)
+        name = f"[Rec] {start}-{end}: {self.model.regions.active_or_root.positive}"
+        import_frames = self._import_frames(keyframes, saves, start, name)
+        eventloop.run(_report_errors(self.model, import_frames))
+
+    async def _import_frames(
+        self, keyframes: list[Path], saves: list[asyncio.Task], start: int, name: str
+    ):
+        await asyncio.gather(*saves)
+        self.model.document.import_animation(keyframes, start)
+        self.model.layers.active.name = name
 
 
 class SamplingQuality(Enum):
@@ -1309,11 +1415,13 @@ class AnimationWorkspace(QObject, ObservableProperties):
     _model: Model
     _keyframes_folder: Path | None = None
     _keyframes: dict[str, list[Path]]
+    _keyframe_saves: dict[str, list[asyncio.Task]]
 
     def __init__(self, model: Model):
         super().__init__()
         self._model = model
         self._keyframes = {}
+        self._keyframe_saves = {}
         self.target_layer_changed.connect(self._update_target_image)
         model.document.current_time_changed.connect(self._update_target_image)
         model.jobs.job_finished.connect(self.handle_job_finished)
@@ -1328,13 +1436,12 @@ class AnimationWorkspace(QObject, ObservableProperties):
         self._model.clear_error()
         eventloop.run(_report_errors(self._model, self._generate_frame()))
 
-    def _prepare_input(self, canvas: Image | Extent, seed: int, time: int):
+    def _prepare_input(self, canvas: Image | Extent, bounds: Bounds, seed: int, time: int):
         m = self._model
 
         kind = WorkflowKind.generate
         if m.strength < 1.0 or m.is_editing:
             kind = WorkflowKind.refine
-        bounds = Bounds(0, 0, *m.document.extent)
         is_live = self.sampling_quality is SamplingQuality.fast
         conditioning, _ = process_regions(m.regions, bounds, self._model.layers.root, time=time)
         conditioning.language = m.prompt_translation_language
@@ -1363,8 +1470,9 @@ class AnimationWorkspace(QObject, ObservableProperties):
         bounds = Bounds(0, 0, *m.document.extent)
         canvas = m._get_current_image(bounds) if requires_image else bounds.extent
         seed = m.seed if m.fixed_seed else workflow.generate_seed()
-        inputs = self._prepare_input(canvas, seed, m.document.current_time)
-        params = JobParams(bounds, m.regions.positive, frame=(m.document.current_time, 0, 0))
+        time = m.document.current_time
+        inputs = self._prepare_input(canvas, bounds, seed, time)
+        params = JobParams(bounds, m.regions.positive, frame=(time, 0, 0))
         await m.enqueue_jobs(inputs, JobKind.animation_frame, params)
 
     def generate_batch(self):
@@ -1396,18 +1504,24 @@ class AnimationWorkspace(QObject, ObservableProperties):
         bounds = Bounds(0, 0, *extent)
         seed = m.seed if m.fixed_seed else workflow.generate_seed()
         animation_id = str(uuid.uuid4())
-
-        for frame in range(start_frame, end_frame + 1):
-            if layer.node.hasKeyframeAtTime(frame) or m.strength == 1.0:
-                canvas: Image | Extent = extent
-                if m.strength < 1.0 or m.arch.is_edit:
-                    canvas = layer.get_pixels(time=frame)
-
-                inputs = self._prepare_input(canvas, seed, frame)
-                params = JobParams(bounds, self._model.regions.active_or_root.positive)
-                params.frame = (frame, start_frame, end_frame)
-                params.animation_id = animation_id
-                await self._model.enqueue_jobs(inputs, JobKind.animation_batch, params)
+        every_frame = m.strength == 1.0
+        requires_image = m.strength < 1.0 or m.arch.is_edit
+        name = m.regions.active_or_root.positive
+
+        with m.regions.cache_control_images():  # static control layers are the same every frame
+            for frame in range(start_frame, end_frame + 1):
+                if every_frame or layer.node.hasKeyframeAtTime(frame):
+                    canvas: Image | Extent = extent
+                    if requires_image:
+                        # Pixel data is wrapped without copying. Each frame gets its own buffer,
+                        # because inputs are consumed asynchronously by the client queue.
+                        canvas = layer.get_pixels(time=frame)
+
+                    inputs = self._prepare_input(canvas, bounds, seed, frame)
+                    params = JobParams(bounds, name)
+                    params.frame = (frame, start_frame, end_frame)
+                    params.animation_id = animation_id
+                    await self._model.enqueue_jobs(inputs, JobKind.animation_batch, params)
 
     def handle_job_finished(self, job: Job):
         if job.kind is JobKind.animation_batch:
@@ -1417,7 +1531,8 @@ class AnimationWorkspace(QObject, ObservableProperties):
             if len(job.results) > 0:
                 image = job.results[0]
                 filename = self._keyframes_folder / f"frame-{frame}.png"
-                image.save(filename)
+                saves = self._keyframe_saves.setdefault(job.params.animation_id, [])
+                saves.append(eventloop.run(_run_in_thread(image.save, filename)))
                 keyframes.append(filename)
                 self.target_image_changed.emit(image)
             elif len(keyframes) > 0:
@@ -1440,10 +1555,14 @@ class AnimationWorkspace(QObject, ObservableProperties):
                     self._model.report_error(_("Target layer not found"))
 
     def _import_animation(self, job: Job):
-        doc = self._model.document
         keyframes = self._keyframes.pop(job.params.animation_id)
+        saves = self._keyframe_saves.pop(job.params.animation_id, [])
+        eventloop.run(_report_errors(self._model, self._import_frames(job, keyframes, saves)))
+
+    async def _import_frames(self, job: Job, keyframes: list[Path], saves: list[asyncio.Task]):
+        await asyncio.gather(*saves)
         _, start, end = job.params.frame
-        doc.import_animation(keyframes, start)
+        self._model.document.import_animation(keyframes, start)
         eventloop.run(self._update_layer_name(f"[Generated] {start}-{end}: {job.params.name}"))
 
     async def _update_layer_name(self, name: str):
@@ -1475,18 +1594,21 @@ class SelectionModifiers(NamedTuple):
 
 
 def get_selection_modifiers(inpaint_mode: InpaintMode, strength: float):
-    feather = settings.selection_feather / 100
-    padding = settings.selection_padding / 100
-    invert = False
+    feather, padding = settings.selection_feather, settings.selection_padding
+    replace_background = inpaint_mode is InpaintMode.replace_background and strength == 1.0
+    return _selection_modifiers(replace_background, feather, padding)
 
-    if inpaint_mode is InpaintMode.replace_background and strength == 1.0:
+
+@lru_cache(maxsize=32)
+def _selection_modifiers(replace_background: bool, feather_setting: int, padding_setting: int):
+    feather = feather_setting / 100
+    padding = padding_setting / 100
+    if replace_background:
         # only minimal grow/feather as there is often no desired transition between
         # forground object and background (to be replaced by something else entirely)
         feather = min(feather, 0.01)
-        invert = True
-
-    padding = padding + feather
-    return SelectionModifiers(feather, padding, invert)
+        return SelectionModifiers(feather, padding + feather, invert=True)
+    return SelectionModifiers(feather, padding + feather, invert=False)
 
 
 async def _report_errors(parent: Model, coro):
@@ -1498,7 +1620,13 @@ async def _report_errors(parent: Model, coro):
         parent.report_error(util.log_error(e))
 
 
-def _save_job_result(model: Model, job: Job | None, index: int):
+async def _run_in_thread(fn: Callable[..., T], *args) -> T:
+    if settings.multi_threading:  # keep the UI responsive while doing expensive work
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+    return fn(*args)
+
+
+async def _save_job_result(model: Model, job: Job | None, index: int):
     assert job is not None, "Cannot save result, invalid job id"
     assert len(job.results) > index, "Cannot save result, invalid result index"
     assert model.document.filename, "Cannot save result, document is not saved"
@@ -1522,22 +1650,30 @@ def _save_job_result(model: Model, job: Job | None, index: int):
         image_name = f"{path.stem}-generated-{timestamp}-{index}-{prompt}"
 
     ext = "." + settings.save_image_format.extension
-    path = path.parent / f"{image_name}{ext}"
-    path = util.find_unused_path(path)
+    file_format = settings.save_image_format
+    metadata_text = None
+    if settings.save_image_metadata and ext == ".png":
+        metadata_text = create_img_metadata(job.params)
+    quality = None
+    if file_format is ImageFileFormat.webp:
+        quality = settings.save_image_quality_webp
+    elif file_format is ImageFileFormat.jpeg:
+        quality = settings.save_image_quality_jpeg
+
+    # Reading the document must happen on the main thread
     base_image = model._get_current_image(Bounds(0, 0, *model.document.extent))
     result_image = job.results[index]
-    base_image.draw_image(result_image, job.params.bounds.offset)
+    offset = job.params.bounds.offset
 
-    if settings.save_image_metadata and ext == ".png":
-        metadata_text = create_img_metadata(job.params)
-        base_image.save_png_with_metadata(
-            filepath=path, metadata_text=metadata_text, format=settings.save_image_format
-        )
-    else:
-        quality = None
-        if settings.save_image_format is ImageFileFormat.webp:
-            quality = settings.save_image_quality_webp
-        elif settings.save_image_format is ImageFileFormat.jpeg:
-            quality = settings.save_image_quality_jpeg
-
-        base_image.save(path, settings.save_image_format, quality)
+    def draw_and_save(path: Path):
+        base_image.draw_image(result_image, offset)
+        if metadata_text is not None:
+            base_image.save_png_with_metadata(
+                filepath=path, metadata_text=metadata_text, format=file_format
+            )
+        else:
+            base_image.save(path, file_format, quality)
+
+    async with model._save_lock:  # pick an unused file name only after previous saves are done
+        path = util.find_unused_path(path.parent / f"{image_name}{ext}")
+        await _run_in_thread(draw_and_save, path)
@@ -5,13 +5,18 @@ import os
 from asyncio import Future
 from datetime import datetime
 from pathlib import Path
-from typing import NamedTuple
+from typing import Any, NamedTuple
 from PyQt5.QtCore import QByteArray, QUrl, QFile, QBuffer
 from PyQt5.QtNetwork import QNetworkAccessManager, QNetworkRequest, QNetworkReply, QSslError
 
 from .localization import translate as _
 from .util import client_logger as log
 
+try:  # faster JSON parsing if available, not shipped with Krita
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
 
 class NetworkError(Exception):
     code: int
@@ -71,11 +76,19 @@ class Request(NamedTuple):
     url: str
     future: asyncio.Future
     buffer: QBuffer | None = None
+    streaming: bool = False  # data is read by the caller as it arrives
+    full_response: bool = False  # result includes HTTP status and headers
 
 
 Headers = list[tuple[str, str]]
 
 
+class Response(NamedTuple):
+    status: int
+    headers: dict[str, str]  # keys are lower-case
+    data: Any
+
+
 class RequestManager:
     def __init__(self):
         self._net = QNetworkAccessManager()
@@ -92,7 +105,13 @@ class RequestManager:
     def set_auth(self, bearer: str):
         self._bearer_token = bearer
 
-    def _prepare_request(self, url: str, timeout: float | None = None, bearer: str | None = None):
+    def _prepare_request(
+        self,
+        url: str,
+        timeout: float | None = None,
+        bearer: str | None = None,
+        headers: Headers | None = None,
+    ):
         request = QNetworkRequest(QUrl(url))
         request.setAttribute(QNetworkRequest.FollowRedirectsAttribute, True)
         bearer_token = bearer or self._bearer_token
@@ -100,6 +119,8 @@ class RequestManager:
             request.setRawHeader(b"Authorization", f"Bearer {bearer_token}".encode("utf-8"))
         for key, value in self._additional_headers:
             request.setRawHeader(key, value)
+        for key, value in headers or []:
+            request.setRawHeader(key.encode("utf-8"), value.encode("utf-8"))
         if timeout is not None:
             request.setTransferTimeout(int(timeout * 1000))
         return request
@@ -143,6 +164,17 @@ class RequestManager:
     def get(self, url: str, timeout: float | None = None, bearer: str | None = None):
         return self.http("GET", url, timeout=timeout, bearer=bearer)
 
+    def get_response(self, url: str, headers: Headers | None = None, timeout: float | None = None):
+        """GET `url` with additional request `headers`. The future resolves to a `Response`
+        which also carries HTTP status and response headers (eg. for conditional requests)."""
+        self._cleanup()
+        request = self._prepare_request(url, timeout, headers=headers)
+        reply = self._net.get(request)
+        assert reply is not None, f"Network request for {url} failed: reply is None"
+        future: Future[Response] = asyncio.get_running_loop().create_future()
+        self._requests[reply] = Request(url, future, full_response=True)
+        return future
+
     def post(self, url: str, data: dict, bearer: str | None = None):
         return self.http("POST", url, data, bearer=bearer)
 
@@ -198,6 +230,34 @@ class RequestManager:
         self._requests[reply] = tracker
         return future
 
+    async def download_stream(self, url: str, timeout: float | None = None):
+        """Download data from `url` and yield it in chunks as it arrives,
+        without collecting the whole response in memory."""
+        self._cleanup()
+        request = self._prepare_request(url, timeout)
+        reply = self._net.get(request)
+        assert reply is not None, f"Network request for {url} failed: reply is None"
+
+        ready = asyncio.Event()
+        reply.readyRead.connect(ready.set)
+        finished = asyncio.get_running_loop().create_future()
+        self._requests[reply] = Request(url, finished, streaming=True)
+        try:
+            while True:
+                waiter = asyncio.ensure_future(ready.wait())
+                await asyncio.wait([waiter, finished], return_when=asyncio.FIRST_COMPLETED)
+                waiter.cancel()
+                ready.clear()
+                if chunk := reply.readAll().data():
+                    yield chunk
+                if finished.done():
+                    break
+            finished.result()  # raises NetworkError if the download failed
+        finally:
+            if not reply.isFinished():
+                finished.cancel()
+                reply.abort()
+
     def _upload_progress(self, bytes_sent: int, bytes_total: int):
         if bytes_total == 0:
             return
@@ -216,16 +276,24 @@ class RequestManager:
             if future.cancelled():
                 return  # operation was cancelled, discard result
             if code == QNetworkReply.NetworkError.NoError:
-                if tracker.buffer is not None:
+                if tracker.streaming:
+                    future.set_result(None)
+                elif tracker.buffer is not None:
                     tracker.buffer.write(reply.readAll())
                     future.set_result(tracker.buffer.data())
                 else:
                     content_type = reply.header(QNetworkRequest.KnownHeaders.ContentTypeHeader)
                     data = reply.readAll().data()
-                    if content_type and ("application/json" in content_type):
-                        future.set_result(json.loads(data))
-                    else:
-                        future.set_result(data)
+                    if content_type and ("application/json" in content_type) and data:
+                        data = json_loads(data)
+                    if tracker.full_response:
+                        status = reply.attribute(QNetworkRequest.Attribute.HttpStatusCodeAttribute)
+                        headers = {
+                            bytes(k).decode("utf-8").lower(): bytes(v).decode("utf-8")
+                            for k, v in reply.rawHeaderPairs()
+                        }
+                        data = Response(status or 0, headers, data)
+                    future.set_result(data)
             else:
                 future.set_exception(NetworkError.from_reply(reply))
         except Exception as e:
@@ -92,17 +92,21 @@ def decode_pipe_bytes(data: bytes) -> str:
     return data.decode(_system_encoding, errors="replace")
 
 
+def long_path(path: str | os.PathLike) -> str:
+    r"""On Windows, prepend \\?\ to the absolute `path` to bypass the MAX_PATH limit."""
+    path = os.path.abspath(path)
+    if not is_windows:
+        return path
+    if path.startswith("\\\\"):
+        return "\\\\?\\UNC\\" + path[2:]
+    return "\\\\?\\" + path
+
+
 class LongPathZipFile(zipfile.ZipFile):
     # zipfile.ZipFile does not support long paths (260+?) on Windows
     # for latest python, changing cwd and using relative paths helps, but not for python in Krita 5.2
     def _extract_member(self, member, targetpath, pwd):
-        # Prepend \\?\ to targetpath to bypass MAX_PATH limit
-        targetpath = os.path.abspath(targetpath)
-        if targetpath.startswith("\\\\"):
-            targetpath = "\\\\?\\UNC\\" + targetpath[2:]
-        else:
-            targetpath = "\\\\?\\" + targetpath
-        return super()._extract_member(member, targetpath, pwd)  # type: ignore
+        return super()._extract_member(member, long_path(targetpath), pwd)  # type: ignore
 
 
 ZipFile = LongPathZipFile if is_windows else zipfile.ZipFile
@@ -1,3 +1,4 @@
+from contextlib import contextmanager
 from copy import copy
 from enum import Enum
 from typing import Any, NamedTuple, Sequence, TypeVar, Generic
@@ -12,6 +13,10 @@ T = TypeVar("T")
 class ObservableProperties:
     """Provides default implementations for properties (get, set, signal) to sub-classes."""
 
+    _batch_depth = 0
+    _silenced = False
+    _signal_buffer: dict[str, tuple[pyqtBoundSignal, tuple]] | None = None
+
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
 
@@ -27,6 +32,46 @@ class ObservableProperties:
                 setter = getattr(cls, property.setter)
             setattr(cls, name, PropertyImpl(name, getter, setter, property.persist))
 
+    @contextmanager
+    def batch(self):
+        """Defer change signals until the outermost batch exits. Each signal is emitted
+        at most once, with the most recent value."""
+        if self._batch_depth == 0:
+            self._signal_buffer = {}
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._signal_buffer is not None:
+                buffer, self._signal_buffer = self._signal_buffer, None
+                for signal, args in buffer.values():
+                    signal.emit(*args)
+
+    @contextmanager
+    def suppress(self):
+        """Update property values without emitting any change signals."""
+        previous = self._silenced
+        self._silenced = True
+        try:
+            yield
+        finally:
+            self._silenced = previous
+
+    def _emit_changed(self, name: str, value, persist=False):
+        self._emit(f"{name}_changed", getattr(self, f"{name}_changed"), value)
+        if persist:
+            if modified_signal := getattr(self, "modified", None):
+                self._emit(f"modified.{name}", modified_signal, self, name)
+
+    def _emit(self, key: str, signal: pyqtBoundSignal, *args):
+        if self._silenced:
+            return
+        if self._signal_buffer is not None:
+            self._signal_buffer[key] = (signal, args)
+        else:
+            signal.emit(*args)
+
 
 class Property(Generic[T]):
     """Property definition. Will be replaced with with PropertyImpl at instance creation."""
@@ -67,12 +112,7 @@ class PropertyImpl(property):
             return
 
         setattr(instance, f"_{self.name}", value)
-        signal = getattr(instance, f"{self.name}_changed")
-        signal.emit(value)
-
-        if self.persist:
-            if modified_signal := getattr(instance, "modified", None):
-                modified_signal.emit(instance, self.name)
+        instance._emit_changed(self.name, value, self.persist)
 
 
 class Binding(NamedTuple):
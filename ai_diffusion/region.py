@@ -1,4 +1,5 @@
 from __future__ import annotations
+from contextlib import ExitStack, contextmanager
 from enum import Enum
 from PyQt5.QtCore import QObject, QMetaObject, QUuid, pyqtSignal
 
@@ -222,6 +223,15 @@ class RootRegion(QObject, ObservableProperties):
     def add_control(self):
         self.active_or_root.control.add()
 
+    @contextmanager
+    def cache_control_images(self):
+        """Cache control layer images of the root and all regions (see `cache_images`)."""
+        with ExitStack() as stack:
+            stack.enter_context(self.control.cache_images())
+            for region in self._regions:
+                stack.enter_context(region.control.cache_images())
+            yield
+
     def is_linked(self, layer: Layer, mode=RegionLink.any):
         return any(r.is_linked(layer, mode) for r in self._regions)
 
@@ -147,6 +147,7 @@ class Style(QObject):
         current = getattr(self, name)
         super().__setattr__(name, value)
         if current != value and name in StyleSettings.__dict__.keys():
+            Styles.revision += 1
             self.changed.emit(name, value)
 
     @staticmethod
@@ -255,6 +256,9 @@ class Styles(QObject):
     changed = pyqtSignal()
     name_changed = pyqtSignal()
 
+    revision = 0
+    """Incremented whenever the list of styles or the settings of any style change."""
+
     _list: list[Style]
 
     @classmethod
@@ -268,6 +272,7 @@ class Styles(QObject):
         self.builtin_folder = builtin_folder
         self.user_folder = user_folder
         self.user_folder.mkdir(exist_ok=True)
+        self.changed.connect(self._increment_revision)
         self.reload()
         settings.changed.connect(self._handle_settings_change)
 
@@ -326,6 +331,9 @@ class Styles(QObject):
         if name == "show_builtin_styles":
             self.changed.emit()
 
+    def _increment_revision(self):
+        Styles.revision += 1
+
     def __getitem__(self, index) -> Style:
         return self._list[index]
 
@@ -22,7 +22,7 @@ from PyQt5.QtCore import Qt, QUrl, pyqtSignal
 from PyQt5.QtGui import QDesktopServices, QPalette, QColor
 from krita import Krita
 
-from ..client import filter_supported_styles, resolve_arch
+from ..client import resolve_arch
 from ..resources import Arch, ResourceId, ResourceKind, search_paths
 from ..settings import Setting, ServerMode, settings
 from ..server import Server
@@ -805,7 +805,7 @@ class StylePresets(SettingsTab):
         self._checkpoint_warning.setVisible(False)
         if client := root.connection.client_if_connected:
             warn = []
-            preferred_cp = self.current_style.preferred_checkpoint(client.models.checkpoints.keys())
+            preferred_cp = client.models.preferred_checkpoint(self.current_style)
             file = root.files.checkpoints.find(preferred_cp)
             if file is None:
                 warn.append(_("The checkpoint used by this style is not installed."))
@@ -843,17 +843,18 @@ class StylePresets(SettingsTab):
 
     def _setup_edit_style(self):
         client = root.connection.client_if_connected
+        styles = client.compatible_styles(show_builtin=True) if client else Styles.list()
         edit_styles = [(_("None"), "")]
         edit_styles.extend(
             (s.name, s.filename)
-            for s in filter_supported_styles(Styles.list(), client)
+            for s in styles
             if s != self.current_style and resolve_arch(s, client).is_edit
         )
         self._edit_style.set_items(edit_styles)
 
     def _read_checkpoint(self, style: Style):
         if client := root.connection.client_if_connected:
-            checkpoint = style.preferred_checkpoint(client.models.checkpoints.keys())
+            checkpoint = client.models.preferred_checkpoint(style)
             self._checkpoint_select.value = checkpoint
         elif style.checkpoints:
             self._checkpoint_select.value = style.checkpoints[0]
@@ -40,7 +40,7 @@ from krita import Krita
 
 from ..style import Style, Styles
 from ..root import root
-from ..client import filter_supported_styles, resolve_arch
+from ..client import resolve_arch
 from ..connection import ConnectionState
 from ..properties import Binding, Bind, bind, bind_combo
 from ..jobs import JobState, JobKind
@@ -336,8 +336,8 @@ class StyleSelectWidget(QWidget):
     def update_styles(self):
         if root.connection.state is not ConnectionState.connected:
             return
-        client = root.connection.client_if_connected
-        self._styles = filter_supported_styles(Styles.list().filtered(), client)
+        client = root.connection.client
+        self._styles = client.compatible_styles()
         if self._value not in self._styles:
             self._styles.insert(0, self._value)
         with SignalBlocker(self._combo):
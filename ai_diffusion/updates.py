@@ -1,20 +1,33 @@
+import asyncio
 import os
 import shutil
 import hashlib
+import json
+import mmap
+import threading
+import time
+import zipfile
 
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
-from tempfile import TemporaryDirectory
-from typing import NamedTuple
 from PyQt5.QtCore import QObject, pyqtSignal
 
 from . import __version__, eventloop
 from .network import RequestManager
 from .properties import ObservableProperties, Property
-from .platform_tools import ZipFile
+from .platform_tools import ZipFile, long_path
 from .util import client_logger as log
 
 
+_hash_chunk_size = 1 << 20  # feed the hasher and file in 1 MiB blocks
+_archive_max_age = 7 * 24 * 60 * 60  # seconds until unused downloads are removed
+_copy_buffer_size = 1 << 20
+_single_read_limit = 8 << 20  # smaller archive members are read in one call
+_parallel_extract_threshold = 16  # extract smaller archives serially
+
+
 class UpdateState(Enum):
     unknown = 1
     checking = 2
@@ -27,7 +40,8 @@ class UpdateState(Enum):
     failed_update = 9
 
 
-class UpdatePackage(NamedTuple):
+@dataclass(slots=True, frozen=True)
+class UpdatePackage:
     version: str
     url: str
     sha256: str
@@ -55,92 +69,278 @@ class AutoUpdate(QObject, ObservableProperties):
         self.current_version = current_version or __version__
         self.api_url = api_url or self.default_api_url
         self._package: UpdatePackage | None = None
-        self._temp_dir: TemporaryDirectory | None = None
-        self._request_manager: RequestManager | None = None
+        # Shared for check and download, so the second request can reuse the connection
+        self._net = RequestManager()
+        self._tasks: set[asyncio.Task] = set()
+        self._check_task: asyncio.Task | None = None
+        self._evict_archives()
 
     def check(self):
-        return eventloop.run(
+        if self._check_task is not None and not self._check_task.done():
+            return self._check_task  # a check is already on its way
+        self._check_task = self._start(
             self._handle_errors(
                 self._check, UpdateState.failed_check, "Failed to check for new plugin version"
             )
         )
+        return self._check_task
 
     async def _check(self):
         if self.state is UpdateState.restart_required:
             return
 
         self.state = UpdateState.checking
+        url = f"{self.api_url}/plugin/latest?version={self.current_version}"
         log.info(f"Checking for latest plugin version at {self.api_url}")
-        result = await self._net.get(
-            f"{self.api_url}/plugin/latest?version={self.current_version}", timeout=10
-        )
-        self.latest_version = result.get("version")
-        if not self.latest_version:
-            log.error(f"Invalid plugin update information: {result}")
-            self.state = UpdateState.failed_check
-            self.error = "Failed to retrieve plugin update information"
-        elif self.latest_version == self.current_version:
-            log.info("Plugin is up to date!")
-            self.state = UpdateState.latest
-        elif "url" not in result or "sha256" not in result:
-            log.error(f"Invalid plugin update information: {result}")
-            self.state = UpdateState.failed_check
-            self.error = "Plugin update package is incomplete"
+        cache = self._read_cache(url)
+        headers = [("If-None-Match", cache["etag"])] if cache and cache.get("etag") else []
+        response = await self._net.get_response(url, headers, timeout=10)
+        if response.status == 304 and cache:
+            result = cache["result"]
         else:
-            log.info(f"New plugin version available: {self.latest_version}")
-            self._package = UpdatePackage(
-                version=self.latest_version,
-                url=result["url"],
-                sha256=result["sha256"],
-            )
-            self.state = UpdateState.available
+            result = response.data
+            etag = response.headers.get("etag")
+            if etag and isinstance(result, dict) and result.get("version"):
+                self._write_cache(url, etag, result)
+        with self.batch():  # emit each signal once, after all properties are updated
+            self.latest_version = result.get("version")
+            if not self.latest_version:
+                log.error(f"Invalid plugin update information: {result}")
+                self.state = UpdateState.failed_check
+                self.error = "Failed to retrieve plugin update information"
+            elif self.latest_version == self.current_version:
+                log.info("Plugin is up to date!")
+                self.state = UpdateState.latest
+            elif "url" not in result or "sha256" not in result:
+                log.error(f"Invalid plugin update information: {result}")
+                self.state = UpdateState.failed_check
+                self.error = "Plugin update package is incomplete"
+            else:
+                log.info(f"New plugin version available: {self.latest_version}")
+                self._package = UpdatePackage(
+                    version=self.latest_version,
+                    url=result["url"],
+                    sha256=result["sha256"],
+                )
+                self.state = UpdateState.available
 
     def run(self):
-        return eventloop.run(
+        return self._start(
             self._handle_errors(self._run, UpdateState.failed_update, "Failed to update plugin")
         )
 
+    def _start(self, coro):
+        # Callers usually don't keep the task, hold a reference so it isn't garbage collected
+        task = eventloop.run(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
     async def _run(self):
         assert self.latest_version and self._package
 
-        self._temp_dir = TemporaryDirectory()
-        archive_path = Path(self._temp_dir.name) / f"krita_ai_diffusion-{self.latest_version}.zip"
-        log.info(f"Downloading plugin update {self._package.url}")
         self.state = UpdateState.downloading
-        archive_data = await self._net.download(self._package.url)
-
-        sha256 = hashlib.sha256(archive_data).hexdigest()
-        if sha256 != self._package.sha256:
-            log.error(f"Update package hash mismatch: {sha256} != {self._package.sha256}")
-            raise RuntimeError("Downloaded plugin package is corrupted or incomplete")
+        archive_path = self._archive_dir / f"{self._package.sha256}.zip"
+        if archive_path.exists() and _file_sha256(archive_path) == self._package.sha256:
+            log.info(f"Using previously downloaded plugin update {archive_path}")
+        else:
+            log.info(f"Downloading plugin update {self._package.url}")
+            await self._download(self._package, archive_path)
 
-        archive_path.write_bytes(archive_data)
-        source_dir = Path(self._temp_dir.name) / f"krita_ai_diffusion-{self.latest_version}"
-        log.info(f"Extracting plugin archive into {source_dir}")
+        log.info(f"Installing new plugin version to {self.plugin_dir}")
         self.state = UpdateState.installing
-        with ZipFile(archive_path) as zip_file:
-            zip_file.extractall(source_dir)
+        staging_dir = self.plugin_dir / f".update_staging.{os.getpid()}"
+        try:
+            with ZipFile(archive_path) as zip_file:
+                _extract_all(zip_file, staging_dir)
+            _replace_entries(staging_dir, self.plugin_dir)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        archive_path.unlink()
 
-        log.info(f"Installing new plugin version to {self.plugin_dir}")
-        shutil.copytree(source_dir, self.plugin_dir, dirs_exist_ok=True)
         self.current_version = self.latest_version
         self.state = UpdateState.restart_required
 
     @property
-    def is_available(self):
-        return self.latest_version is not None and self.latest_version != self.current_version
+    def _cache_path(self):
+        return self.plugin_dir / ".update_cache.json"
+
+    def _read_cache(self, url: str) -> dict | None:
+        try:
+            if self._cache_path.exists():
+                cache = json.loads(self._cache_path.read_text(encoding="utf-8"))
+                if (
+                    isinstance(cache, dict)
+                    and cache.get("url") == url
+                    and isinstance(cache.get("result"), dict)
+                ):
+                    return cache
+        except (OSError, ValueError) as e:
+            log.warning(f"Failed to read plugin update cache: {e}")
+        return None
+
+    def _write_cache(self, url: str, etag: str, result: dict):
+        cache = {"url": url, "etag": etag, "result": result}
+        try:
+            self._cache_path.write_text(json.dumps(cache), encoding="utf-8")
+        except (OSError, TypeError, ValueError) as e:
+            log.warning(f"Failed to write plugin update cache: {e}")
+
+    async def _download(self, package: UpdatePackage, archive_path: Path):
+        archive_path.parent.mkdir(parents=True, exist_ok=True)
+        part_path = archive_path.with_suffix(".part")
+        hasher = hashlib.new("sha256", usedforsecurity=False)
+        loop = asyncio.get_running_loop()
+        archive_file = await loop.run_in_executor(None, part_path.open, "wb")
+
+        def write(data: bytes):
+            hasher.update(data)
+            archive_file.write(data)
+
+        try:
+            pending = bytearray()
+            async for chunk in self._net.download_stream(package.url):
+                pending += chunk
+                if len(pending) >= _hash_chunk_size:
+                    await loop.run_in_executor(None, write, bytes(pending))
+                    pending.clear()
+            await loop.run_in_executor(None, write, bytes(pending))
+        finally:
+            archive_file.close()
+
+        sha256 = hasher.hexdigest()
+        if sha256 != package.sha256:
+            part_path.unlink()
+            log.error(f"Update package hash mismatch: {sha256} != {package.sha256}")
+            raise RuntimeError("Downloaded plugin package is corrupted or incomplete")
+        os.replace(part_path, archive_path)
 
     @property
-    def _net(self):
-        if self._request_manager is None:
-            self._request_manager = RequestManager()
-        return self._request_manager
+    def _archive_dir(self):
+        return self.plugin_dir / ".update_archives"
+
+    def _evict_archives(self):
+        """Remove downloads left behind by failed installs."""
+        try:
+            if self._archive_dir.exists():
+                expired = time.time() - _archive_max_age
+                for file in self._archive_dir.iterdir():
+                    if file.stat().st_mtime < expired:
+                        file.unlink()
+        except OSError as e:
+            log.warning(f"Failed to clean up plugin update archives: {e}")
+
+    @property
+    def is_available(self):
+        return self.latest_version is not None and self.latest_version != self.current_version
 
     async def _handle_errors(self, func, error_state: UpdateState, message: str):
         try:
             return await func()
         except Exception as e:
             log.exception(e)
-            self.error = f"{message}: {e}"
-            self.state = error_state
+            with self.batch():
+                self.error = f"{message}: {e}"
+                self.state = error_state
             return None
+
+
+def _extract_all(zip_file: zipfile.ZipFile, target_dir: Path):
+    """Extract all members of `zip_file` into `target_dir`, copying with large buffers
+    and creating each directory only once."""
+    target_dir = target_dir.resolve()
+    directories: set[Path] = set()
+    files: list[tuple[zipfile.ZipInfo, Path]] = []
+    for info in zip_file.infolist():
+        path = (target_dir / info.filename).resolve()
+        if not path.is_relative_to(target_dir):
+            raise RuntimeError(f"Invalid path in plugin archive: {info.filename}")
+        if info.is_dir():
+            directories.add(path)
+        else:
+            directories.add(path.parent)
+            files.append((info, path))
+
+    for directory in sorted(directories):
+        os.makedirs(long_path(directory), exist_ok=True)
+
+    # Workers share `zip_file`. It serializes reads on the underlying file, but not the
+    # reference counting done when a member is opened or closed.
+    open_lock = threading.Lock()
+
+    def extract(member: tuple[zipfile.ZipInfo, Path]):
+        info, path = member
+        with open(long_path(path), "wb") as dst:
+            if info.file_size == 0:
+                return
+            if hasattr(os, "posix_fallocate"):
+                try:
+                    os.posix_fallocate(dst.fileno(), 0, info.file_size)
+                except OSError:
+                    pass  # not supported by the file system
+            with open_lock:
+                src = zip_file.open(info)
+            try:
+                if info.file_size <= _single_read_limit:  # one allocation of the exact size
+                    dst.write(src.read(info.file_size))
+                else:
+                    shutil.copyfileobj(src, dst, _copy_buffer_size)
+            finally:
+                with open_lock:
+                    src.close()
+
+    if len(files) < _parallel_extract_threshold:
+        for member in files:
+            extract(member)
+    else:
+        # Decompression and file writes release the GIL.
+        with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as executor:
+            list(executor.map(extract, files))
+
+
+def _replace_entries(source_dir: Path, target_dir: Path):
+    """Move the top-level entries of `source_dir` into `target_dir`. Existing directories
+    are renamed aside and swapped, so a plugin is never left half updated. Files which
+    are only in the installed directory (eg. user files) are kept."""
+    for entry in source_dir.iterdir():
+        target = target_dir / entry.name
+        if not (entry.is_dir() and target.exists()):
+            os.replace(entry, target)
+            continue
+        previous = target_dir / f".{entry.name}.previous"
+        try:
+            if previous.exists():
+                raise FileExistsError(f"{previous} is left over from an earlier update")
+            os.replace(target, previous)
+        except OSError as e:  # eg. files in use on Windows
+            log.warning(f"Could not move {target} aside, updating files in place: {e}")
+            shutil.copytree(entry, target, dirs_exist_ok=True)
+            continue
+        os.replace(entry, target)
+        try:
+            _move_missing(previous, target)
+        except OSError as e:
+            log.warning(f"Failed to carry over files from the previous version: {e}")
+            log.warning(f"Remaining files are kept in {previous}")
+            continue
+        shutil.rmtree(previous, ignore_errors=True)
+
+
+def _move_missing(source_dir: Path, target_dir: Path):
+    """Move entries of `source_dir` which don't exist in `target_dir` over, recursively."""
+    for entry in source_dir.iterdir():
+        target = target_dir / entry.name
+        if not target.exists():
+            os.replace(entry, target)
+        elif entry.is_dir() and target.is_dir():
+            _move_missing(entry, target)
+
+
+def _file_sha256(path: Path):
+    hasher = hashlib.new("sha256", usedforsecurity=False)
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size > 0:  # empty files can't be mapped
+            # Hash the mapped file in one call, pages are read on demand
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                hasher.update(mapped)
+    return hasher.hexdigest()
@@ -1,5 +1,6 @@
 from enum import Enum, Flag
 from dataclasses import asdict, is_dataclass
+from functools import lru_cache
 from itertools import islice
 from pathlib import Path
 from typing import Generator
@@ -174,6 +175,7 @@ def read_json_with_comments(path: Path):
     return json.loads("\n".join("" if line.strip().startswith("//") else line for line in lines))
 
 
+@lru_cache(maxsize=64)
 def sanitize_prompt(prompt: str):
     if prompt == "":
         return "no prompt"
@@ -187,10 +189,12 @@ def find_unused_path(path: Path):
         return path
     stem = path.stem
     ext = path.suffix
+    with os.scandir(path.parent) as entries:
+        existing = {entry.name.casefold() for entry in entries}  # may be case-insensitive
     i = 1
-    while (new_path := path.with_name(f"{stem}-{i}{ext}")).exists():
+    while (name := f"{stem}-{i}{ext}").casefold() in existing:
         i += 1
-    return new_path
+    return path.with_name(name)
 
 
 def acquire_elements(l: list[QOBJECT]) -> list[QOBJECT]:
@@ -1211,6 +1211,7 @@ def create_control_image(
             mask_type="based_on_depth",
             rand_seed=seed if seed != -1 else generate_seed(),
         )
+        w.track_seed(result, "rand_seed", random_seed=seed == -1)
         if bounds is not None:
             result = w.scale_image(result, bounds.extent)
             empty = w.empty_image(current_extent)
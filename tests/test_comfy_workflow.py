@@ -4,7 +4,7 @@ from pathlib import Path
 import pytest
 
 from ai_diffusion.comfy_workflow import ComfyObjectInfo
-from ai_diffusion.comfy_workflow import ComfyWorkflow
+from ai_diffusion.comfy_workflow import ComfyWorkflow, ConditioningOutput, Output
 
 
 @pytest.fixture(scope="module")
@@ -113,3 +113,25 @@ def test_defaults_legacy_combo(info: ComfyObjectInfo):
     assert inputs["images"] == "img"
     assert inputs["format"] == "PNG"
     assert set(inputs.keys()) == {"images", "format"}
+
+
+def test_reseed(monkeypatch):
+    monkeypatch.setattr("ai_diffusion.comfy_workflow.random.randint", lambda a, b: 7)
+    w = ComfyWorkflow()
+    model = Output(0, 0)
+    cond = ConditioningOutput(Output(0, 1), Output(0, 2))
+    w.ksampler(model, cond, Output(0, 3), seed=42)
+    w.ksampler_advanced(model, cond, Output(0, 3), seed=42)
+    w.add("INPAINT_InpaintWithModel", 1, seed=42)
+    preprocessor = w.add("MeshGraphormer-DepthMapPreprocessor", 1, rand_seed=42)
+    w.track_seed(preprocessor, "rand_seed", random_seed=True)
+    w.image_data["img"] = b"data"
+
+    r = w.reseed(43)
+    assert r.root["1"]["inputs"]["seed"] == 43
+    assert r.root["2"]["inputs"]["noise_seed"] == 43
+    assert r.root["3"]["inputs"] == {"seed": 42}  # not a tracked seed input
+    assert r.root["4"]["inputs"]["rand_seed"] == 7  # chosen again
+    assert r.image_data is w.image_data and r.node_count == w.node_count
+    assert w.root["1"]["inputs"]["seed"] == 42
+    assert r.reseed(44).root["1"]["inputs"]["seed"] == 44
@@ -0,0 +1,41 @@
+from ai_diffusion.image import Bounds
+from ai_diffusion.jobs import Job, JobKind, JobParams, JobQueue
+
+
+def test_find():
+    jobs = JobQueue()
+    params = JobParams(Bounds(0, 0, 1, 1), "test")
+    restored = jobs.add_job(Job("restored", JobKind.diffusion, params))
+    job = jobs.add(JobKind.diffusion, params)
+    assert jobs.find("restored") is restored
+    assert job.id is None
+
+    jobs.set_id(job, "job1")
+    assert job.id == "job1"
+    assert jobs.find("job1") is job
+
+    jobs.remove(job)
+    assert jobs.find("job1") is None
+    assert jobs.find("restored") is restored
+
+
+def test_executing_count():
+    jobs = JobQueue()
+    params = JobParams(Bounds(0, 0, 1, 1), "test")
+    first = jobs.add(JobKind.diffusion, params)
+    second = jobs.add(JobKind.control_layer, params)
+    assert not jobs.any_executing()
+
+    jobs.notify_started(first)
+    jobs.notify_started(first)
+    jobs.notify_started(second)
+    assert jobs.any_executing() and jobs.executing_count == 2
+
+    jobs.notify_finished(second)  # cancels earlier jobs, removes non-diffusion jobs
+    assert not jobs.any_executing() and jobs.executing_count == 0
+    assert len(jobs) == 1
+
+    third = jobs.add(JobKind.diffusion, params)
+    jobs.notify_started(third)
+    jobs.remove(third)
+    assert jobs.executing_count == 0
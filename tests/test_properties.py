@@ -217,3 +217,40 @@ def test_modified():
     a.inty = 5
     a.not_persistent = 5
     assert called == [(a, "inty")]
+
+
+def test_batch():
+    called = []
+
+    def callback(*args):
+        called.append(args)
+
+    a = PersistentObject()
+    a.inty_changed.connect(callback)
+    a.stringy_changed.connect(callback)
+    a.modified.connect(callback)
+    with a.batch():
+        a.inty = 5
+        a.stringy = "hello"
+        with a.batch():
+            a.inty = 6
+        assert a.inty == 6
+        assert called == []
+    assert called == [(6,), (a, "inty"), ("hello",), (a, "stringy")]
+
+    called.clear()
+    a.inty = 7
+    assert called == [(7,), (a, "inty")]
+
+
+def test_suppress():
+    called = []
+
+    a = PersistentObject()
+    a.inty_changed.connect(called.append)
+    with a.suppress():
+        a.inty = 5
+    assert a.inty == 5
+    assert called == []
+    a.inty = 6
+    assert called == [6]
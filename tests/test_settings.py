@@ -5,6 +5,7 @@ from pathlib import Path
 from ai_diffusion.settings import PerformancePreset, Settings, Setting, ServerMode
 from ai_diffusion.style import Style, Styles, StyleSettings, SamplerPreset, SamplerPresets
 from ai_diffusion.style import legacy_map as style_legacy_map
+from ai_diffusion.client import ClientModels, CheckpointInfo
 
 
 def test_get_set():
@@ -196,3 +197,17 @@ def test_sampler_preset_conversion():
     presets = SamplerPresets()
     for old, new in style_legacy_map.items():
         assert presets[old] == presets[new]
+
+
+def test_preferred_checkpoint_cached():
+    models = ClientModels()
+    models.checkpoints = {"cats": CheckpointInfo.deduce_from_filename("cats")}
+    style = Style(Path("test_style.json"))
+    style.checkpoints = ["birds", "cats"]
+    assert models.preferred_checkpoint(style) == "cats"
+    models.checkpoints["birds"] = CheckpointInfo.deduce_from_filename("birds")
+    assert models.preferred_checkpoint(style) == "birds"
+    models.checkpoints = {}
+    assert models.preferred_checkpoint(style) == "not-found"
+    style.checkpoints = []
+    assert models.preferred_checkpoint(style) == "not-found"
@@ -1,11 +1,17 @@
+import hashlib
+import io
+import json
 import os
+import zipfile
 import pytest
 from aiohttp import ClientSession
 from pathlib import Path
 from PyQt5.QtCore import pyqtBoundSignal
 
+from ai_diffusion import updates
+from ai_diffusion.network import Response
 from ai_diffusion.platform_tools import ZipFile
-from ai_diffusion.updates import AutoUpdate, UpdateState
+from ai_diffusion.updates import AutoUpdate, UpdatePackage, UpdateState
 from .conftest import CloudService
 
 
@@ -115,3 +121,224 @@ async def test_authorization(cloud_service: CloudService):
         # Upload requires authorization
         async with session.put("/plugin/upload/1.2.3") as response:
             assert response.status == 401
+
+
+def create_archive(files: dict[str, bytes | str]):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as zip_file:
+        for name, content in files.items():
+            zip_file.writestr(name, content)
+    return buffer.getvalue()
+
+
+def extract(archive: bytes, target: Path):
+    with zipfile.ZipFile(io.BytesIO(archive)) as zip_file:
+        updates._extract_all(zip_file, target)
+
+
+def test_extract_all(tmp_path: Path):
+    large = b"large" * (2 << 20)  # above the single read limit
+    archive = create_archive({
+        "plugin/": "",
+        "plugin/empty/": "",
+        "plugin/zero.txt": "",
+        "plugin/sub/small.py": "print('hi')",
+        "plugin/sub/large.bin": large,
+    })
+    extract(archive, tmp_path)
+    assert (tmp_path / "plugin" / "empty").is_dir()
+    assert (tmp_path / "plugin" / "zero.txt").read_bytes() == b""
+    assert (tmp_path / "plugin" / "sub" / "small.py").read_text() == "print('hi')"
+    assert (tmp_path / "plugin" / "sub" / "large.bin").read_bytes() == large
+
+
+def test_extract_all_rejects_outside_paths(tmp_path: Path):
+    target = tmp_path / "target"
+    archive = create_archive({"plugin/ok.txt": "ok", "../evil.txt": "evil"})
+    with pytest.raises(RuntimeError, match=r"evil\.txt"):
+        extract(archive, target)
+    assert not (tmp_path / "evil.txt").exists()
+    assert not target.exists()  # nothing is written before all paths are checked
+
+
+def test_extract_all_parallel(tmp_path: Path, monkeypatch):
+    executors = []
+
+    class Executor(updates.ThreadPoolExecutor):
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            executors.append(self)
+
+    monkeypatch.setattr(updates, "ThreadPoolExecutor", Executor)
+    files = {f"plugin/dir{i % 4}/file{i}.py": f"content {i}" * 100 for i in range(20)}
+    extract(create_archive(files), tmp_path)
+    assert len(executors) == 1
+    for name, content in files.items():
+        assert (tmp_path / name).read_text() == content
+
+    executors.clear()
+    extract(create_archive({"few/a.txt": "a", "few/b.txt": "b"}), tmp_path)
+    assert len(executors) == 0
+    assert (tmp_path / "few" / "b.txt").read_text() == "b"
+
+
+def test_file_sha256(tmp_path: Path):
+    empty = tmp_path / "empty.zip"
+    empty.write_bytes(b"")
+    assert updates._file_sha256(empty) == hashlib.sha256(b"").hexdigest()
+
+    file = tmp_path / "file.zip"
+    file.write_bytes(b"data" * 1000)
+    assert updates._file_sha256(file) == hashlib.sha256(b"data" * 1000).hexdigest()
+
+
+def test_replace_entries(tmp_path: Path):
+    installed = tmp_path / "pykrita"
+    (installed / "plugin" / ".server" / "models").mkdir(parents=True)
+    (installed / "plugin" / ".server" / "models" / "model.bin").write_text("user data")
+    (installed / "plugin" / "user.txt").write_text("keep")
+    (installed / "plugin" / "module.py").write_text("old")
+    (installed / "plugin.desktop").write_text("old")
+    (installed / "other_plugin").mkdir()
+
+    staging = tmp_path / "staging"
+    (staging / "plugin" / ".server").mkdir(parents=True)
+    (staging / "plugin" / ".server" / "readme.txt").write_text("new")
+    (staging / "plugin" / "module.py").write_text("new")
+    (staging / "plugin" / "added.py").write_text("new")
+    (staging / "plugin.desktop").write_text("new")
+
+    updates._replace_entries(staging, installed)
+    plugin = installed / "plugin"
+    assert (plugin / "module.py").read_text() == "new"
+    assert (plugin / "added.py").read_text() == "new"
+    assert (plugin / "user.txt").read_text() == "keep"
+    assert (plugin / ".server" / "models" / "model.bin").read_text() == "user data"
+    assert (plugin / ".server" / "readme.txt").read_text() == "new"
+    assert (installed / "plugin.desktop").read_text() == "new"
+    assert (installed / "other_plugin").is_dir()
+    assert not (installed / ".plugin.previous").exists()
+
+
+class FakeNetwork:
+    def __init__(self, archive: bytes = b"", chunk_size=1000):
+        self.archive = archive
+        self.chunk_size = chunk_size
+        self.downloads = 0
+        self.responses: list[Response] = []
+        self.requests: list[tuple[str, list]] = []
+
+    async def download_stream(self, url: str):
+        self.downloads += 1
+        for i in range(0, len(self.archive), self.chunk_size):
+            yield self.archive[i : i + self.chunk_size]
+
+    async def get_response(self, url: str, headers=None, timeout=None):
+        self.requests.append((url, headers or []))
+        return self.responses.pop(0)
+
+
+def create_updater(plugin_dir: Path, net: FakeNetwork, archive: bytes):
+    updater = AutoUpdate(plugin_dir=plugin_dir, current_version="1.0.0", api_url="http://test")
+    updater._net = net  # type: ignore
+    updater.latest_version = "1.0.1"
+    updater._package = UpdatePackage("1.0.1", "http://test/plugin.zip", _sha256(archive))
+    return updater
+
+
+async def awaited(start):
+    return await start()
+
+
+def _sha256(data: bytes):
+    return hashlib.sha256(data).hexdigest()
+
+
+def test_run_update(qtapp, tmp_path: Path):
+    archive = create_archive({"plugin/module.py": "new" * 1000})
+    net = FakeNetwork(archive)
+    updater = create_updater(tmp_path, net, archive)
+    qtapp.run(awaited(updater.run))
+
+    assert updater.state is UpdateState.restart_required, updater.error
+    assert net.downloads == 1
+    assert (tmp_path / "plugin" / "module.py").read_text() == "new" * 1000
+    assert list((tmp_path / ".update_archives").iterdir()) == []
+
+
+def test_run_update_hash_mismatch(qtapp, tmp_path: Path):
+    archive = create_archive({"plugin/module.py": "new"})
+    updater = create_updater(tmp_path, FakeNetwork(archive + b"corrupt"), archive)
+    qtapp.run(awaited(updater.run))
+
+    assert updater.state is UpdateState.failed_update
+    assert "corrupted" in updater.error
+    assert list((tmp_path / ".update_archives").iterdir()) == []
+    assert not (tmp_path / "plugin").exists()
+
+
+def test_run_update_reuses_downloaded_archive(qtapp, tmp_path: Path):
+    archive = create_archive({"plugin/module.py": "new"})
+    net = FakeNetwork(archive)
+    updater = create_updater(tmp_path, net, archive)
+    archive_dir = tmp_path / ".update_archives"
+    archive_dir.mkdir()
+    (archive_dir / f"{_sha256(archive)}.zip").write_bytes(archive)
+    qtapp.run(awaited(updater.run))
+
+    assert updater.state is UpdateState.restart_required, updater.error
+    assert net.downloads == 0
+    assert (tmp_path / "plugin" / "module.py").read_text() == "new"
+
+
+def test_run_update_replaces_corrupt_archive(qtapp, tmp_path: Path):
+    archive = create_archive({"plugin/module.py": "new"})
+    net = FakeNetwork(archive)
+    updater = create_updater(tmp_path, net, archive)
+    archive_dir = tmp_path / ".update_archives"
+    archive_dir.mkdir()
+    (archive_dir / f"{_sha256(archive)}.zip").write_bytes(b"incomplete")
+    qtapp.run(awaited(updater.run))
+
+    assert updater.state is UpdateState.restart_required, updater.error
+    assert net.downloads == 1
+
+
+def test_check_etag_cache(qtapp, tmp_path: Path):
+    net = FakeNetwork()
+    updater = AutoUpdate(plugin_dir=tmp_path, current_version="1.0.0", api_url="http://test")
+    updater._net = net  # type: ignore
+    package = {"version": "1.0.1", "url": "http://test/plugin.zip", "sha256": "abc"}
+    net.responses.append(Response(200, {"etag": '"v1"'}, package))
+    qtapp.run(awaited(updater.check))
+
+    assert updater.state is UpdateState.available
+    assert net.requests[0][1] == []
+    cache = json.loads((tmp_path / ".update_cache.json").read_text())
+    assert cache["etag"] == '"v1"' and cache["result"] == package
+
+    net.responses.append(Response(304, {}, b""))
+    updater._package = None
+    qtapp.run(awaited(updater.check))
+
+    assert net.requests[1][1] == [("If-None-Match", '"v1"')]
+    assert updater.state is UpdateState.available
+    assert updater._package == UpdatePackage("1.0.1", "http://test/plugin.zip", "abc")
+
+
+def test_check_ignores_bad_cache(qtapp, tmp_path: Path):
+    (tmp_path / ".update_cache.json").write_text("{not json")
+    net = FakeNetwork()
+    net.responses.append(Response(200, {}, {"version": "1.0.0"}))
+    updater = AutoUpdate(plugin_dir=tmp_path, current_version="1.0.0", api_url="http://test")
+    updater._net = net  # type: ignore
+    qtapp.run(awaited(updater.check))
+
+    assert updater.state is UpdateState.latest
+    assert net.requests[0][1] == []
+    assert (tmp_path / ".update_cache.json").read_text() == "{not json"  # no etag, not cached
+
+    other_version = {"url": "http://test/other", "etag": '"x"', "result": {"version": "9"}}
+    (tmp_path / ".update_cache.json").write_text(json.dumps(other_version))
+    assert updater._read_cache("http://test/plugin/latest?version=1.0.0") is None
+